@@ -3,8 +3,10 @@ NewsGenie - AI-Powered News Assistant
 Main Streamlit Application
 """
 import streamlit as st
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from src.workflows.graph import run_workflow
+from src.workflows.graph import stream_workflow
+from src.workflows.nodes import get_chatbot_agent
 from src.config import settings
 
 # Page configuration
@@ -15,8 +17,9 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# Custom CSS for better styling
-st.markdown("""
+# Custom CSS for better styling. Streamlit drops any element a rerun does not
+# emit, so this has to be written on every run; keep it to the rules in use.
+CUSTOM_CSS = """
     <style>
     .main-header {
         font-size: 3rem;
@@ -31,34 +34,46 @@ st.markdown("""
         text-align: center;
         margin-bottom: 2rem;
     }
-    .chat-message {
-        padding: 1rem;
-        border-radius: 0.5rem;
-        margin-bottom: 1rem;
-    }
-    .user-message {
-        background-color: #e3f2fd;
-        border-left: 4px solid #1f77b4;
-    }
-    .assistant-message {
-        background-color: #f5f5f5;
-        border-left: 4px solid #4caf50;
-    }
     .stButton>button {
         width: 100%;
     }
     </style>
-""", unsafe_allow_html=True)
+"""
+st.markdown(CUSTOM_CSS, unsafe_allow_html=True)
+
+# Static sidebar content, built once per process and sent as single elements
+# instead of one st.write call per line
+CATEGORIES_MARKDOWN = "Available categories:\n\n" + "\n".join(
+    f"- {category.title()}" for category in settings.news_categories
+)
+
+ABOUT_MARKDOWN = (
+    f"**Model:** {settings.openai_model}  \n"
+    "**Version:** 1.0.0  \n"
+    "Built with ❤️ using LangChain & Streamlit"
+)
+
+SAMPLE_QUERIES = (
+    "What's the latest technology news?",
+    "Show me business headlines",
+    "Tell me about recent AI developments",
+    "What's happening in sports?",
+    "How do I learn Python?"
+)
 
 
 def initialize_session_state():
     """Initialize session state variables"""
     if "messages" not in st.session_state:
         st.session_state.messages = []
-    if "chat_history" not in st.session_state:
-        st.session_state.chat_history = []
     if "workflow_running" not in st.session_state:
         st.session_state.workflow_running = False
+    if "agent_warmup" not in st.session_state:
+        # Build the shared agent in the background so the first message
+        # does not pay for client setup while the user is still typing
+        executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="newsgenie-warmup")
+        st.session_state.agent_warmup = executor.submit(get_chatbot_agent)
+        executor.shutdown(wait=False)
 
 
 def validate_api_keys():
@@ -93,25 +108,29 @@ def process_user_input(user_input: str):
     with st.chat_message("user"):
         st.markdown(user_input)
     
-    # Show assistant is thinking
+    # Stream the assistant's response as it is generated
     with st.chat_message("assistant"):
         with st.spinner("Thinking..."):
             try:
-                # Run the workflow
-                result = run_workflow(
-                    user_input=user_input,
-                    chat_history=st.session_state.chat_history
-                )
-                
-                # Get the response
-                response = result.get("final_response", "I apologize, but I couldn't generate a response.")
+                # Make sure the background warm-up has finished; any error is
+                # raised again, and handled, when the workflow builds the agent
+                st.session_state.agent_warmup.exception()
                 
-                # Check for errors
-                if result.get("error"):
-                    response = f"⚠️ {result['error']}\n\n{response}"
+                # Conversation context is the displayed messages before this
+                # one, without failed turns, limited to the turns the agent
+                # will actually use
+                max_messages = settings.max_history_turns * 2
+                chat_history = [
+                    message for message in st.session_state.messages[:-1]
+                    if not message.get("failed")
+                ][-max_messages:] if max_messages > 0 else []
                 
-                # Display response
-                st.markdown(response)
+                # Run the workflow; write_stream renders chunks as they arrive
+                # and returns the full response
+                response = st.write_stream(stream_workflow(
+                    user_input=user_input,
+                    chat_history=chat_history
+                ))
                 
                 # Add to chat history
                 st.session_state.messages.append({
@@ -119,91 +138,88 @@ def process_user_input(user_input: str):
                     "content": response
                 })
                 
-                # Update conversation history for context
-                st.session_state.chat_history.append({
-                    "role": "user",
-                    "content": user_input
-                })
-                st.session_state.chat_history.append({
-                    "role": "assistant",
-                    "content": response
-                })
-                
             except Exception as e:
                 error_msg = f"❌ An error occurred: {str(e)}"
                 st.error(error_msg)
+                # Keep the failed turn on screen but out of the LLM context
+                st.session_state.messages[-1]["failed"] = True
                 st.session_state.messages.append({
                     "role": "assistant",
-                    "content": error_msg
+                    "content": error_msg,
+                    "failed": True
                 })
 
 
-def main():
-    """Main application"""
-    # Initialize session state
-    initialize_session_state()
-    
-    # Header
-    st.markdown('<div class="main-header">📰 NewsGenie</div>', unsafe_allow_html=True)
-    st.markdown(
-        f'<div class="sub-header">{settings.app_description}</div>',
-        unsafe_allow_html=True
-    )
-    
-    # Validate API keys
-    if not validate_api_keys():
-        st.stop()
-    
-    # Sidebar
+def clear_chat_history():
+    """Button callback: clear the conversation before the next run renders it"""
+    st.session_state.messages = []
+
+
+def queue_sample_query(query: str):
+    """Button callback: queue a sample query for the run the click triggers"""
+    st.session_state.pending_query = query
+
+
+def render_sidebar():
+    """Render the sidebar (after the chat area, so the stats are current)"""
     with st.sidebar:
         st.header("⚙️ Settings")
         
         # News Categories
         st.subheader("📑 News Categories")
-        st.write("Available categories:")
-        for category in settings.news_categories:
-            st.write(f"• {category.title()}")
+        st.markdown(CATEGORIES_MARKDOWN)
         
         st.markdown("---")
         
         # Quick Actions
         st.subheader("⚡ Quick Actions")
         
-        if st.button("🗑️ Clear Chat History"):
-            st.session_state.messages = []
-            st.session_state.chat_history = []
-            st.rerun()
+        st.button("🗑️ Clear Chat History", on_click=clear_chat_history)
         
         st.markdown("---")
         
         # Sample Queries
         st.subheader("💡 Sample Queries")
-        sample_queries = [
-            "What's the latest technology news?",
-            "Show me business headlines",
-            "Tell me about recent AI developments",
-            "What's happening in sports?",
-            "How do I learn Python?"
-        ]
-        
-        for query in sample_queries:
-            if st.button(query, key=f"sample_{query}"):
-                st.session_state.sample_query = query
+        for query in SAMPLE_QUERIES:
+            st.button(
+                query,
+                key=f"sample_{query}",
+                on_click=queue_sample_query,
+                args=(query,)
+            )
         
         st.markdown("---")
         
         # Statistics
         st.subheader("📊 Session Stats")
         st.metric("Messages", len(st.session_state.messages))
-        st.metric("Conversations", len(st.session_state.chat_history) // 2)
+        st.metric(
+            "Conversations",
+            sum(1 for message in st.session_state.messages if message["role"] == "user")
+        )
         
         st.markdown("---")
         
         # About
         st.subheader("ℹ️ About")
-        st.write(f"**Model:** {settings.openai_model}")
-        st.write("**Version:** 1.0.0")
-        st.write("Built with ❤️ using LangChain & Streamlit")
+        st.markdown(ABOUT_MARKDOWN)
+
+
+def main():
+    """Main application"""
+    # Initialize session state
+    initialize_session_state()
+    
+    # Header
+    st.markdown('<div class="main-header">📰 NewsGenie</div>', unsafe_allow_html=True)
+    st.markdown(
+        f'<div class="sub-header">{settings.app_description}</div>',
+        unsafe_allow_html=True
+    )
+    
+    # Validate API keys
+    if not validate_api_keys():
+        st.stop()
     
     # Main chat area
     st.markdown("---")
@@ -211,17 +227,14 @@ def main():
     # Display chat history
     display_chat_history()
     
-    # Handle sample query button click
-    if hasattr(st.session_state, 'sample_query'):
-        query = st.session_state.sample_query
-        del st.session_state.sample_query
-        process_user_input(query)
-        st.rerun()
+    # Handle a sample query queued by its button callback
+    pending_query = st.session_state.pop("pending_query", None)
+    if pending_query:
+        process_user_input(pending_query)
     
     # Chat input
     if prompt := st.chat_input("Ask me anything about news or general topics..."):
         process_user_input(prompt)
-        st.rerun()
     
     # Welcome message for first visit
     if len(st.session_state.messages) == 0:
@@ -244,6 +257,10 @@ I'm your AI-powered news assistant. I can help you with:
 
 How can I help you today?
             """)
+    
+    # Sidebar is rendered last so it reflects this run's messages without
+    # needing a second rerun
+    render_sidebar()
 
 
 if __name__ == "__main__":
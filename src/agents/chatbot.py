@@ -2,15 +2,88 @@
 Main chatbot agent for NewsGenie
 Handles general queries and conversation management
 """
-from typing import Dict, Any, List, Optional
+import logging
+import re
+from functools import cached_property
+from typing import Callable, Dict, Any, Iterator, List, Optional
 from langchain_openai import ChatOpenAI
 from langchain.prompts import ChatPromptTemplate, MessagesPlaceholder
 from langchain.schema import HumanMessage, AIMessage, SystemMessage
 from langchain_core.runnables import RunnablePassthrough
+from pydantic import BaseModel, Field
 
 from src.config import settings
 
 
+logger = logging.getLogger("newsgenie.workflow")
+
+# Keywords that mark a query as a news request without asking the LLM.
+# Category names ("business", "health", "science", ...) are deliberately not
+# included: they are everyday words in how-to and explanation questions
+NEWS_KEYWORDS_RE = re.compile(
+    r"\b(news|headline|headlines|latest|breaking)\b",
+    re.IGNORECASE
+)
+
+# Words that hint at current events without settling it: category names and
+# time markers. A query containing one is left to the LLM rather than
+# classified as general by the opener or short-query rules
+NEWS_HINTS_RE = re.compile(
+    r"\b("
+    + "|".join(settings.news_categories)
+    + r"|today|tonight|yesterday|this (week|month|year)|current|currently"
+    r"|recent|recently|top stories|new|update|updates|tech"
+    r"|election|elections|results)\b",
+    re.IGNORECASE
+)
+
+# Openers of how-to / explanation questions, treated as general conversation
+# unless a news keyword or hint is present. "What is happening / going on"
+# asks about current events, so it is left to the LLM
+GENERAL_QUERY_RE = re.compile(
+    r"^\s*(how (do|can|should|would) (i|you|we)|"
+    r"what (is|are|does)(?! (happening|going on))|"
+    r"what's the difference|explain|define|why (do|does|is|are))\b",
+    re.IGNORECASE
+)
+
+# Queries with no news keywords or hints and at most this many words are
+# treated as general conversation ("hi", "thanks!") without an LLM call
+MIN_LLM_CLASSIFY_WORDS = 3
+
+# Draft content held back before streaming, so that a short preamble ahead
+# of a NewsLookup tool call is never shown to the user
+DRAFT_HOLD_CHARS = 80
+
+CLASSIFY_PROMPT_TEMPLATE = """Analyze this user query and determine if it's requesting news/current events or if it's a general question.
+
+User query: "{query}"
+
+A query is news-related if it:
+- Asks about current events, recent news, or breaking news
+- Requests news in specific categories (business, tech, sports, etc.)
+- Asks "what's happening" or "latest news"
+- References recent/current events
+
+A query is general if it:
+- Asks for explanations, definitions, or how-to information
+- Requests recommendations or advice
+- Is conversational or personal
+- Asks about historical facts or timeless information"""
+
+
+class QueryClassification(BaseModel):
+    """Structured output schema for query classification"""
+    is_news_request: bool = Field(description="Whether the query asks for news or current events")
+    confidence: float = Field(ge=0.0, le=1.0, description="Confidence in the classification, 0.0 to 1.0")
+    reasoning: str = Field(description="Brief explanation")
+
+
+class NewsLookup(BaseModel):
+    """Look up recent news articles. Call this when the user asks about news, current events or anything recent; otherwise answer directly."""
+    query: str = Field(description="What to search the news for")
+
+
 class NewsGenieAgent:
     """
     Main chatbot agent that handles conversations and routes requests
@@ -23,7 +96,8 @@ class NewsGenieAgent:
             model=settings.openai_model,
             temperature=settings.temperature,
             max_tokens=settings.max_tokens,
-            api_key=settings.openai_api_key
+            api_key=settings.openai_api_key,
+            streaming=True
         )
         
         # System prompt for the agent
@@ -57,6 +131,20 @@ Always be informative, objective, and helpful."""
         
         # Create the chain
         self.chain = self.prompt | self.llm
+        
+        # Chat chain that can request a news lookup instead of answering,
+        # so one call both routes the query and drafts a general response
+        self.drafter = self.prompt | self.llm.bind_tools([NewsLookup])
+    
+    @cached_property
+    def classifier(self):
+        """
+        Classifier constrained to the QueryClassification schema
+        
+        Built on first use: the workflow classifies through
+        classify_and_draft, so only direct classify_query callers need it.
+        """
+        return self.llm.with_structured_output(QueryClassification)
     
     def classify_query(self, query: str) -> Dict[str, Any]:
         """
@@ -68,48 +156,17 @@ Always be informative, objective, and helpful."""
         Returns:
             Dictionary with classification results
         """
-        classification_prompt = f"""Analyze this user query and determine if it's requesting news/current events or if it's a general question.
-
-User query: "{query}"
-
-Respond with ONLY a JSON object in this exact format:
-{{
-    "is_news_request": true or false,
-    "confidence": 0.0 to 1.0,
-    "reasoning": "brief explanation"
-}}
-
-A query is news-related if it:
-- Asks about current events, recent news, or breaking news
-- Requests news in specific categories (business, tech, sports, etc.)
-- Asks "what's happening" or "latest news"
-- References recent/current events
-
-A query is general if it:
-- Asks for explanations, definitions, or how-to information
-- Requests recommendations or advice
-- Is conversational or personal
-- Asks about historical facts or timeless information"""
+        classification = self._classify_by_keywords(query)
+        if classification is not None:
+            return classification
+        
+        classification_prompt = CLASSIFY_PROMPT_TEMPLATE.format(query=query)
 
         try:
-            response = self.llm.invoke([HumanMessage(content=classification_prompt)])
-            
-            # Parse the response
-            import json
-            # Remove markdown code blocks if present
-            content = response.content.strip()
-            if content.startswith("```json"):
-                content = content[7:]
-            if content.startswith("```"):
-                content = content[3:]
-            if content.endswith("```"):
-                content = content[:-3]
-            content = content.strip()
-            
-            result = json.loads(content)
-            return result
+            result = self.classifier.invoke([HumanMessage(content=classification_prompt)])
+            return result.model_dump()
         except Exception as e:
-            print(f"Error classifying query: {e}")
+            logger.error("Error classifying query: %s", e)
             # Default to general query on error
             return {
                 "is_news_request": False,
@@ -117,6 +174,147 @@ A query is general if it:
                 "reasoning": "Classification error, defaulting to general query"
             }
     
+    def classify_and_draft(
+        self,
+        user_input: str,
+        chat_history: List = None,
+        on_token: Optional[Callable[[str], None]] = None
+    ) -> Dict[str, Any]:
+        """
+        Classify a query and, for general queries, draft the response in the
+        same LLM call
+        
+        Queries the keyword heuristics can decide skip the LLM and get no
+        draft. Otherwise the chat chain runs with a NewsLookup tool: a tool
+        call routes the query to news, a direct answer is the draft.
+        
+        The first DRAFT_HOLD_CHARS of content are held back, so a short
+        preamble ahead of a tool call is never shown. Once content has been
+        passed to on_token the call is committed to answering directly: a
+        later tool call is ignored, and a failure ends the draft with an
+        apology instead of leaving the response to be generated again.
+        
+        Args:
+            user_input: The user's message
+            chat_history: Previous conversation history (LangChain messages)
+            on_token: Optional callback receiving draft chunks as they arrive
+            
+        Returns:
+            Dictionary with classification results, draft_response (None
+            when no draft was produced) and draft_error (set when the draft
+            was cut short by an error)
+        """
+        classification = self._classify_by_keywords(user_input)
+        if classification is not None:
+            return {**classification, "draft_response": None, "draft_error": None}
+        
+        chat_history = self._recent_history(chat_history)
+        
+        held = []
+        held_chars = 0
+        emitted = []
+        
+        def emit(text: str) -> None:
+            emitted.append(text)
+            if on_token is not None:
+                on_token(text)
+        
+        try:
+            for chunk in self.drafter.stream({
+                "input": user_input,
+                "chat_history": chat_history
+            }):
+                if chunk.tool_call_chunks and not emitted:
+                    # The model is looking up news; drop any held preamble
+                    return {
+                        "is_news_request": True,
+                        "confidence": 0.9,
+                        "reasoning": "model requested a news lookup",
+                        "draft_response": None,
+                        "draft_error": None
+                    }
+                
+                if not chunk.content:
+                    continue
+                
+                if emitted:
+                    emit(chunk.content)
+                    continue
+                
+                held.append(chunk.content)
+                held_chars += len(chunk.content)
+                if held_chars >= DRAFT_HOLD_CHARS:
+                    emit("".join(held))
+            
+            if not emitted and held:
+                emit("".join(held))
+            draft_error = None
+        except Exception as e:
+            if not emitted:
+                logger.error("Error classifying query: %s", e)
+                # Default to general query on error; nothing was shown, so
+                # the response is generated separately
+                return {
+                    "is_news_request": False,
+                    "confidence": 0.5,
+                    "reasoning": "Classification error, defaulting to general query",
+                    "draft_response": None,
+                    "draft_error": None
+                }
+            
+            logger.error("Error drafting response: %s", e)
+            emit(f"\n\nI apologize, but I encountered an error: {str(e)}")
+            draft_error = str(e)
+        
+        return {
+            "is_news_request": False,
+            "confidence": 0.9,
+            "reasoning": "model answered directly",
+            "draft_response": "".join(emitted) or None,
+            "draft_error": draft_error
+        }
+    
+    @staticmethod
+    def _classify_by_keywords(query: str) -> Optional[Dict[str, Any]]:
+        """
+        Classify a query from keywords alone, without an LLM call
+        
+        Args:
+            query: User's input query
+            
+        Returns:
+            Classification dictionary, or None if the query is ambiguous
+        """
+        # Keyword matches are routed to news without an LLM round-trip
+        if NEWS_KEYWORDS_RE.search(query):
+            return {
+                "is_news_request": True,
+                "confidence": 0.9,
+                "reasoning": "keyword match"
+            }
+        
+        has_news_hint = NEWS_HINTS_RE.search(query) is not None
+        
+        # How-to and explanation questions with no news keywords or hints
+        # are general; "what is new in technology?" is left to the LLM
+        if not has_news_hint and GENERAL_QUERY_RE.search(query):
+            return {
+                "is_news_request": False,
+                "confidence": 0.9,
+                "reasoning": "general question pattern"
+            }
+        
+        # Short queries with no news keywords or hints are conversational;
+        # "sports today" or "tech updates please" are left to the LLM
+        if not has_news_hint and len(query.split()) <= MIN_LLM_CLASSIFY_WORDS:
+            return {
+                "is_news_request": False,
+                "confidence": 0.9,
+                "reasoning": "short query with no news keywords"
+            }
+        
+        return None
+    
     def chat(self, user_input: str, chat_history: List = None) -> str:
         """
         Process a user message and generate a response
@@ -128,19 +326,57 @@ A query is general if it:
         Returns:
             AI response as string
         """
-        if chat_history is None:
-            chat_history = []
+        return "".join(self.stream(user_input, chat_history))
+    
+    def stream(
+        self,
+        user_input: str,
+        chat_history: List = None,
+        raise_errors: bool = False
+    ) -> Iterator[str]:
+        """
+        Process a user message and yield the response as it is generated
+        
+        Args:
+            user_input: The user's message
+            chat_history: Previous conversation history
+            raise_errors: Re-raise LLM errors instead of yielding an apology
+            
+        Yields:
+            Chunks of the AI response text
+        """
+        # Only send the most recent turns so prompt size stays bounded
+        chat_history = self._recent_history(chat_history)
         
         try:
-            # Invoke the chain
-            response = self.chain.invoke({
+            # Stream the chain output token by token
+            for chunk in self.chain.stream({
                 "input": user_input,
                 "chat_history": chat_history
-            })
-            
-            return response.content
+            }):
+                if chunk.content:
+                    yield chunk.content
         except Exception as e:
-            return f"I apologize, but I encountered an error: {str(e)}"
+            if raise_errors:
+                raise
+            yield f"I apologize, but I encountered an error: {str(e)}"
+    
+    @staticmethod
+    def _recent_history(chat_history: Optional[List]) -> List:
+        """
+        Keep only the last max_history_turns turns of a conversation
+        
+        Args:
+            chat_history: Conversation messages, oldest first
+            
+        Returns:
+            The most recent messages (none when max_history_turns is 0)
+        """
+        chat_history = chat_history or []
+        max_messages = settings.max_history_turns * 2
+        if max_messages <= 0:
+            return []
+        return chat_history[-max_messages:]
     
     def format_chat_history(self, messages: List[Dict[str, str]]) -> List:
         """
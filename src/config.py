@@ -2,34 +2,51 @@
 Configuration management for NewsGenie
 Handles environment variables and application settings
 """
-import os
-from typing import Optional
-from dotenv import load_dotenv
-from pydantic_settings import BaseSettings
-
-# Load environment variables from .env file
-load_dotenv()
+from functools import lru_cache
+from typing import Optional, Tuple
+from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
 class Settings(BaseSettings):
-    """Application settings and configuration"""
+    """
+    Application settings and configuration
+    
+    Field values are read from the environment (or .env) by pydantic-settings,
+    matching field names case-insensitively (e.g. OPENAI_API_KEY).
+    """
+    
+    model_config = SettingsConfigDict(
+        env_file=".env",
+        case_sensitive=False,
+        extra="ignore"
+    )
     
     # API Keys
-    openai_api_key: str = os.getenv("OPENAI_API_KEY", "")
-    news_api_key: str = os.getenv("NEWS_API_KEY", "")
+    openai_api_key: str = ""
+    news_api_key: str = ""
     
     # Model Configuration
-    openai_model: str = os.getenv("OPENAI_MODEL", "gpt-4-turbo-preview")
+    openai_model: str = "gpt-4-turbo-preview"
     temperature: float = 0.7
     max_tokens: int = 1000
+    # Conversation turns (user + assistant pairs) sent to the LLM as context
+    max_history_turns: int = 12
     
     # Application Settings
-    app_title: str = os.getenv("APP_TITLE", "NewsGenie")
-    app_description: str = os.getenv("APP_DESCRIPTION", "Your AI-powered news assistant")
+    app_title: str = "NewsGenie"
+    app_description: str = "Your AI-powered news assistant"
+    
+    # Threads shared by all workflow runs in the process. A run holds one
+    # thread for the whole streamed LLM response (two during the news/web
+    # lookups), so this caps how many sessions can be answered at once;
+    # further runs wait for a free thread
+    workflow_max_workers: int = 32
     
     # News API Settings
     news_api_page_size: int = 10
-    news_categories: list = [
+    # Searches fetch (and cache) this many times the requested page size
+    news_api_search_window_factor: int = 4
+    news_categories: Tuple[str, ...] = (
         "general",
         "business",
         "technology",
@@ -37,7 +54,7 @@ class Settings(BaseSettings):
         "health",
         "science",
         "sports"
-    ]
+    )
     
     def validate_api_keys(self) -> dict:
         """Validate that required API keys are present"""
@@ -52,11 +69,13 @@ class Settings(BaseSettings):
             "valid": len(missing_keys) == 0,
             "missing_keys": missing_keys
         }
-    
-    class Config:
-        env_file = ".env"
-        case_sensitive = False
 
 
-# Create global settings instance
-settings = Settings()
\ No newline at end of file
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """Get the shared settings instance (built on first use)"""
+    return Settings()
+
+
+# Global settings instance
+settings = get_settings()
@@ -1,13 +1,110 @@
 """
 News API integration tool for fetching real-time news articles
 """
+import asyncio
+from dataclasses import dataclass
 from typing import List, Dict, Any, Optional
 from datetime import datetime, timedelta
 import requests
-from newsapi import NewsApiClient
+from requests.adapters import HTTPAdapter
+import streamlit as st
 
 from src.config import settings
 
+# newsapi is imported on first use, so sessions that never fetch news do not
+# pay for loading it (requests is already loaded by streamlit and langchain)
+
+
+@dataclass(slots=True, frozen=True)
+class Article:
+    """A formatted news article"""
+    title: str
+    description: str
+    url: str
+    source: str
+    author: str
+    published_at: str
+    content: str
+    image_url: str
+
+
+# Largest pageSize NewsAPI accepts
+NEWS_API_MAX_PAGE_SIZE = 100
+
+# Category lookup set for O(1) validation
+VALID_CATEGORIES = frozenset(settings.news_categories)
+
+# Display template for a single article, filled from its formatted fields
+ARTICLE_DISPLAY_TEMPLATE = """
+**{index}. {article.title}**
+Source: {article.source}
+Published: {article.published_at}
+{article.description}
+Read more: {article.url}
+"""
+
+# Shared fallback for articles without a source, so none is allocated per article
+EMPTY_SOURCE = {"name": "Unknown"}
+
+
+@st.cache_resource(show_spinner=False)
+def get_http_session() -> requests.Session:
+    """
+    Get the shared, connection-pooled HTTP session for NewsAPI requests
+    
+    Reusing one session keeps connections alive between calls, so repeat
+    requests skip the TCP and TLS handshake.
+    """
+    session = requests.Session()
+    # One kept-alive connection per workflow thread, so concurrent lookups
+    # never overflow the pool and discard connections
+    session.mount("https://", HTTPAdapter(
+        pool_connections=10,
+        pool_maxsize=settings.workflow_max_workers
+    ))
+    return session
+
+
+# Cached NewsAPI calls. Arguments are plain hashable values so Streamlit can
+# key the cache on them; the leading underscore keeps the fetcher itself out
+# of the cache key. Exceptions are not cached, so failed calls are retried.
+@st.cache_data(ttl=300, max_entries=128, show_spinner=False)
+def _fetch_top_headlines(
+    _fetcher: "NewsFetcher",
+    category: Optional[str],
+    country: str,
+    page_size: int
+) -> Dict[str, Any]:
+    """Fetch and format top headlines (cached for 5 minutes)"""
+    response = _fetcher.client.get_top_headlines(
+        category=category,
+        country=country,
+        page_size=page_size
+    )
+    return _fetcher._format_response(response)
+
+
+@st.cache_data(ttl=600, max_entries=128, show_spinner=False)
+def _fetch_everything(
+    _fetcher: "NewsFetcher",
+    query: str,
+    from_date: str,
+    to_date: str,
+    language: str,
+    sort_by: str,
+    page_size: int
+) -> Dict[str, Any]:
+    """Search and format articles from /everything (cached for 10 minutes)"""
+    response = _fetcher.client.get_everything(
+        q=query,
+        from_param=from_date,
+        to=to_date,
+        language=language,
+        sort_by=sort_by,
+        page_size=page_size
+    )
+    return _fetcher._format_response(response)
+
 
 class NewsFetcher:
     """
@@ -19,8 +116,14 @@ class NewsFetcher:
         if not settings.news_api_key:
             raise ValueError("NEWS_API_KEY not found in environment variables")
         
-        self.client = NewsApiClient(api_key=settings.news_api_key)
+        from newsapi import NewsApiClient
+        
+        self.client = NewsApiClient(
+            api_key=settings.news_api_key,
+            session=get_http_session()
+        )
         self.page_size = settings.news_api_page_size
+        self.search_window_factor = settings.news_api_search_window_factor
     
     def get_top_headlines(
         self,
@@ -42,13 +145,7 @@ class NewsFetcher:
         try:
             page_size = page_size or self.page_size
             
-            response = self.client.get_top_headlines(
-                category=category,
-                country=country,
-                page_size=page_size
-            )
-            
-            return self._format_response(response)
+            return _fetch_top_headlines(self, category, country, page_size)
         
         except Exception as e:
             return {
@@ -89,16 +186,27 @@ class NewsFetcher:
             if not to_date:
                 to_date = datetime.now()
             
-            response = self.client.get_everything(
-                q=query,
-                from_param=from_date.strftime("%Y-%m-%d"),
-                to=to_date.strftime("%Y-%m-%d"),
-                language=language,
-                sort_by=sort_by,
-                page_size=page_size
+            # Fetch a window a few times the page size (capped at NewsAPI's
+            # maximum) and slice it locally, so a 5-article search does not
+            # download 100. Dates are passed at day granularity so repeated
+            # searches within the same day share the cache entry.
+            window = min(page_size * self.search_window_factor, NEWS_API_MAX_PAGE_SIZE)
+            response = _fetch_everything(
+                self,
+                query,
+                from_date.strftime("%Y-%m-%d"),
+                to_date.strftime("%Y-%m-%d"),
+                language,
+                sort_by,
+                window
             )
             
-            return self._format_response(response)
+            if response["status"] == "success":
+                articles = response["articles"][:page_size]
+                response["articles"] = articles
+                response["message"] = f"Found {len(articles)} articles"
+            
+            return response
         
         except Exception as e:
             return {
@@ -110,7 +218,8 @@ class NewsFetcher:
     def get_news_by_category(
         self,
         category: str,
-        country: str = "us"
+        country: str = "us",
+        page_size: Optional[int] = None
     ) -> Dict[str, Any]:
         """
         Convenience method to get news by category
@@ -118,20 +227,65 @@ class NewsFetcher:
         Args:
             category: News category
             country: Country code
+            page_size: Number of articles to fetch
             
         Returns:
             Dictionary containing articles and metadata
         """
         # Validate category
-        valid_categories = settings.news_categories
-        if category.lower() not in valid_categories:
+        if category.lower() not in VALID_CATEGORIES:
             return {
                 "status": "error",
-                "message": f"Invalid category. Valid options: {', '.join(valid_categories)}",
+                "message": f"Invalid category. Valid options: {', '.join(settings.news_categories)}",
                 "articles": []
             }
         
-        return self.get_top_headlines(category=category.lower(), country=country)
+        return self.get_top_headlines(
+            category=category.lower(),
+            country=country,
+            page_size=page_size
+        )
+    
+    async def aget_top_headlines(
+        self,
+        category: Optional[str] = None,
+        country: str = "us",
+        page_size: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        Async version of get_top_headlines
+        
+        The blocking call runs in a worker thread, so several fetches can be
+        awaited together with asyncio.gather while still sharing the cache.
+        """
+        return await asyncio.to_thread(
+            self.get_top_headlines, category, country, page_size
+        )
+    
+    async def asearch_news(
+        self,
+        query: str,
+        from_date: Optional[datetime] = None,
+        to_date: Optional[datetime] = None,
+        language: str = "en",
+        sort_by: str = "publishedAt",
+        page_size: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """Async version of search_news (runs in a worker thread)"""
+        return await asyncio.to_thread(
+            self.search_news, query, from_date, to_date, language, sort_by, page_size
+        )
+    
+    async def aget_news_by_category(
+        self,
+        category: str,
+        country: str = "us",
+        page_size: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """Async version of get_news_by_category (runs in a worker thread)"""
+        return await asyncio.to_thread(
+            self.get_news_by_category, category, country, page_size
+        )
     
     def _format_response(self, response: Dict) -> Dict[str, Any]:
         """
@@ -152,19 +306,21 @@ class NewsFetcher:
         
         articles = response.get("articles", [])
         
-        # Format each article
-        formatted_articles = []
-        for article in articles:
-            formatted_articles.append({
-                "title": article.get("title", "No title"),
-                "description": article.get("description", "No description available"),
-                "url": article.get("url", ""),
-                "source": article.get("source", {}).get("name", "Unknown"),
-                "author": article.get("author", "Unknown"),
-                "published_at": article.get("publishedAt", ""),
-                "content": article.get("content", ""),
-                "image_url": article.get("urlToImage", "")
-            })
+        # Format each article (NewsAPI sends null for missing fields, so
+        # fall back with `or` rather than relying on .get defaults)
+        formatted_articles = [
+            Article(
+                title=article.get("title") or "No title",
+                description=article.get("description") or "No description available",
+                url=article.get("url") or "",
+                source=(article.get("source") or EMPTY_SOURCE).get("name") or "Unknown",
+                author=article.get("author") or "Unknown",
+                published_at=article.get("publishedAt") or "",
+                content=article.get("content") or "",
+                image_url=article.get("urlToImage") or ""
+            )
+            for article in articles
+        ]
         
         return {
             "status": "success",
@@ -173,12 +329,12 @@ class NewsFetcher:
             "message": f"Found {len(formatted_articles)} articles"
         }
     
-    def format_articles_for_display(self, articles: List[Dict]) -> str:
+    def format_articles_for_display(self, articles: List[Article]) -> str:
         """
         Format articles into a readable string for the chatbot
         
         Args:
-            articles: List of article dictionaries
+            articles: List of articles
             
         Returns:
             Formatted string
@@ -186,14 +342,7 @@ class NewsFetcher:
         if not articles:
             return "No articles found."
         
-        formatted = []
-        for i, article in enumerate(articles, 1):
-            formatted.append(f"""
-**{i}. {article['title']}**
-Source: {article['source']}
-Published: {article['published_at']}
-{article['description']}
-Read more: {article['url']}
-""")
-        
-        return "\n".join(formatted)
\ No newline at end of file
+        return "\n".join(
+            ARTICLE_DISPLAY_TEMPLATE.format(index=i, article=article)
+            for i, article in enumerate(articles, 1)
+        )
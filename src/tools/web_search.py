@@ -1,8 +1,82 @@
 """
 Web search tool using DuckDuckGo for additional information retrieval
 """
-from typing import List, Dict, Any, Optional
-from duckduckgo_search import DDGS
+import asyncio
+from dataclasses import dataclass
+from typing import List, Dict, Any, Optional, Union
+from urllib.parse import urlsplit
+import streamlit as st
+
+# duckduckgo_search is imported on first use, so sessions that never search
+# the web do not pay for loading it
+
+
+@dataclass(slots=True, frozen=True)
+class WebResult:
+    """A formatted web search result"""
+    title: str
+    snippet: str
+    url: str
+    source: str
+
+
+@dataclass(slots=True, frozen=True)
+class NewsResult:
+    """A formatted DuckDuckGo news result"""
+    title: str
+    snippet: str
+    url: str
+    source: str
+    date: str
+    image: str
+
+
+# Display templates for a single result, filled from its formatted fields
+WEB_RESULT_TEMPLATE = """
+**{index}. {result.title}**
+Source: {result.source}
+{result.snippet}
+Link: {result.url}
+"""
+
+NEWS_RESULT_TEMPLATE = """
+**{index}. {result.title}**
+Source: {result.source} | Date: {result.date}
+{result.snippet}
+Read more: {result.url}
+"""
+
+
+# Cached DuckDuckGo calls, keyed on the query arguments only (the leading
+# underscore keeps the tool itself out of the cache key)
+@st.cache_data(ttl=900, max_entries=128, show_spinner=False)
+def _search_text(
+    _tool: "WebSearchTool",
+    query: str,
+    region: str,
+    max_results: int
+) -> Dict[str, Any]:
+    """Run and format a DuckDuckGo text search (cached for 15 minutes)"""
+    results = list(_tool.ddgs.text(
+        keywords=query,
+        region=region,
+        max_results=max_results
+    ))
+    return _tool._format_response(results, query)
+
+
+@st.cache_data(ttl=900, max_entries=128, show_spinner=False)
+def _search_news(
+    _tool: "WebSearchTool",
+    query: str,
+    max_results: int
+) -> Dict[str, Any]:
+    """Run and format a DuckDuckGo news search (cached for 15 minutes)"""
+    results = list(_tool.ddgs.news(
+        keywords=query,
+        max_results=max_results
+    ))
+    return _tool._format_news_response(results, query)
 
 
 class WebSearchTool:
@@ -10,15 +84,20 @@ class WebSearchTool:
     Tool for searching the web using DuckDuckGo
     """
     
-    def __init__(self, max_results: int = 5):
+    def __init__(self, max_results: int = 5, timeout: int = 10):
         """
         Initialize the web search tool
         
         Args:
             max_results: Maximum number of search results to return
+            timeout: Request timeout in seconds
         """
+        from duckduckgo_search import DDGS
+        
         self.max_results = max_results
-        self.ddgs = DDGS()
+        # One DDGS client for the tool's lifetime, so its HTTP connections
+        # are reused across searches
+        self.ddgs = DDGS(timeout=timeout)
     
     def search(
         self,
@@ -41,13 +120,7 @@ class WebSearchTool:
             max_results = max_results or self.max_results
             
             # Perform the search
-            results = list(self.ddgs.text(
-                keywords=query,
-                region=region,
-                max_results=max_results
-            ))
-            
-            return self._format_response(results, query)
+            return _search_text(self, query, region, max_results)
         
         except Exception as e:
             return {
@@ -75,12 +148,7 @@ class WebSearchTool:
             max_results = max_results or self.max_results
             
             # Perform news search
-            results = list(self.ddgs.news(
-                keywords=query,
-                max_results=max_results
-            ))
-            
-            return self._format_news_response(results, query)
+            return _search_news(self, query, max_results)
         
         except Exception as e:
             return {
@@ -89,6 +157,28 @@ class WebSearchTool:
                 "results": []
             }
     
+    async def asearch(
+        self,
+        query: str,
+        max_results: Optional[int] = None,
+        region: str = "wt-wt"
+    ) -> Dict[str, Any]:
+        """
+        Async version of search
+        
+        The blocking call runs in a worker thread, so it can be awaited
+        together with NewsAPI requests via asyncio.gather.
+        """
+        return await asyncio.to_thread(self.search, query, max_results, region)
+    
+    async def asearch_news(
+        self,
+        query: str,
+        max_results: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """Async version of search_news (runs in a worker thread)"""
+        return await asyncio.to_thread(self.search_news, query, max_results)
+    
     def _format_response(
         self,
         results: List[Dict],
@@ -113,14 +203,15 @@ class WebSearchTool:
                 "message": "No results found"
             }
         
-        formatted_results = []
-        for result in results:
-            formatted_results.append({
-                "title": result.get("title", "No title"),
-                "snippet": result.get("body", "No description available"),
-                "url": result.get("href", ""),
-                "source": result.get("href", "").split("/")[2] if result.get("href") else "Unknown"
-            })
+        formatted_results = [
+            WebResult(
+                title=result.get("title") or "No title",
+                snippet=result.get("body") or "No description available",
+                url=result.get("href") or "",
+                source=urlsplit(result.get("href") or "").netloc or "Unknown"
+            )
+            for result in results
+        ]
         
         return {
             "status": "success",
@@ -154,16 +245,17 @@ class WebSearchTool:
                 "message": "No news found"
             }
         
-        formatted_results = []
-        for result in results:
-            formatted_results.append({
-                "title": result.get("title", "No title"),
-                "snippet": result.get("body", "No description available"),
-                "url": result.get("url", ""),
-                "source": result.get("source", "Unknown"),
-                "date": result.get("date", "Unknown date"),
-                "image": result.get("image", "")
-            })
+        formatted_results = [
+            NewsResult(
+                title=result.get("title") or "No title",
+                snippet=result.get("body") or "No description available",
+                url=result.get("url") or "",
+                source=result.get("source") or "Unknown",
+                date=result.get("date") or "Unknown date",
+                image=result.get("image") or ""
+            )
+            for result in results
+        ]
         
         return {
             "status": "success",
@@ -175,14 +267,14 @@ class WebSearchTool:
     
     def format_results_for_display(
         self,
-        results: List[Dict],
+        results: List[Union[WebResult, NewsResult]],
         result_type: str = "web"
     ) -> str:
         """
         Format search results into a readable string
         
         Args:
-            results: List of result dictionaries
+            results: List of web or news results
             result_type: Type of results ("web" or "news")
             
         Returns:
@@ -191,21 +283,10 @@ class WebSearchTool:
         if not results:
             return "No results found."
         
-        formatted = []
-        for i, result in enumerate(results, 1):
-            if result_type == "news":
-                formatted.append(f"""
-**{i}. {result['title']}**
-Source: {result['source']} | Date: {result['date']}
-{result['snippet']}
-Read more: {result['url']}
-""")
-            else:
-                formatted.append(f"""
-**{i}. {result['title']}**
-Source: {result['source']}
-{result['snippet']}
-Link: {result['url']}
-""")
-        
-        return "\n".join(formatted)
\ No newline at end of file
+        # Pick the template once rather than per result
+        template = NEWS_RESULT_TEMPLATE if result_type == "news" else WEB_RESULT_TEMPLATE
+        
+        return "\n".join(
+            template.format(index=i, result=result)
+            for i, result in enumerate(results, 1)
+        )
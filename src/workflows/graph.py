@@ -2,67 +2,66 @@
 LangGraph workflow definition for NewsGenie
 Orchestrates the query processing pipeline
 """
-from typing import Literal
+import asyncio
+import hashlib
+import json
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from functools import lru_cache
+from typing import AsyncIterator, Optional
+from cachetools import TTLCache
 from langgraph.graph import StateGraph, END
+from src.config import settings
 from src.workflows.state import GraphState
 from src.workflows.nodes import (
     classify_query_node,
     fetch_news_node,
     web_search_node,
+    join_results_node,
     generate_response_node,
     handle_general_query_node
 )
 
 
-def should_fetch_news(state: GraphState) -> Literal["fetch_news", "handle_general"]:
-    """
-    Router: Determine if we should fetch news or handle as general query
-    
-    Args:
-        state: Current graph state
-        
-    Returns:
-        Next node name to route to
-    """
-    classification = state.get("query_classification", {})
-    is_news = classification.get("is_news_request", False)
-    confidence = classification.get("confidence", 0.0)
-    
-    # Route to news fetching if classified as news with reasonable confidence
-    if is_news and confidence > 0.6:
-        return "fetch_news"
-    else:
-        return "handle_general"
+logger = logging.getLogger("newsgenie.workflow")
 
 
-def should_add_web_search(state: GraphState) -> Literal["web_search", "generate_response"]:
-    """
-    Router: Determine if we should add web search or proceed to response generation
+class _SharedThreadPoolExecutor(ThreadPoolExecutor):
+    """Thread pool that outlives the event loops it is installed on
     
-    Args:
-        state: Current graph state
-        
-    Returns:
-        Next node name to route to
+    asyncio.run() and loop.close() shut down a loop's default executor;
+    for the shared pool that is a no-op so its threads are reused.
     """
-    news_results = state.get("news_results", {})
     
-    # Add web search if news fetch failed or returned limited results
-    if news_results.get("status") == "error":
-        return "web_search"
-    
-    articles = news_results.get("articles", [])
-    if len(articles) < 3:
-        return "web_search"
-    
-    # Otherwise, proceed directly to response generation
-    return "generate_response"
+    def shutdown(self, wait: bool = True, *, cancel_futures: bool = False) -> None:
+        pass
+
+
+# Default executor for every workflow run: sync nodes and the tools'
+# asyncio.to_thread calls reuse these threads instead of a fresh pool per run.
+# Shared by every session; see Settings.workflow_max_workers for the cap
+_executor = _SharedThreadPoolExecutor(
+    max_workers=settings.workflow_max_workers,
+    thread_name_prefix="newsgenie"
+)
+
+# Final states of recent successful runs, keyed by _cache_key
+RESPONSE_CACHE_SIZE = 512
+RESPONSE_CACHE_TTL = 300
+_response_cache = TTLCache(maxsize=RESPONSE_CACHE_SIZE, ttl=RESPONSE_CACHE_TTL)
+_response_cache_lock = threading.Lock()
 
 
+@lru_cache(maxsize=1)
 def create_workflow() -> StateGraph:
     """
     Create and configure the NewsGenie workflow graph
     
+    The graph is built, validated and compiled once; later calls return the
+    same compiled graph, which is safe to share since no state is kept on it.
+    
     Returns:
         Compiled StateGraph ready for execution
     """
@@ -73,79 +72,200 @@ def create_workflow() -> StateGraph:
     workflow.add_node("classify_query", classify_query_node)
     workflow.add_node("fetch_news", fetch_news_node)
     workflow.add_node("web_search", web_search_node)
+    workflow.add_node("join_results", join_results_node)
     workflow.add_node("generate_response", generate_response_node)
     workflow.add_node("handle_general", handle_general_query_node)
     
-    # Set entry point
+    # Set entry point; classify_query routes onward itself via Command
     workflow.set_entry_point("classify_query")
     
-    # Add conditional routing from classification
-    workflow.add_conditional_edges(
-        "classify_query",
-        should_fetch_news,
-        {
-            "fetch_news": "fetch_news",
-            "handle_general": "handle_general"
-        }
-    )
-    
-    # Add conditional routing from news fetching
-    workflow.add_conditional_edges(
-        "fetch_news",
-        should_add_web_search,
-        {
-            "web_search": "web_search",
-            "generate_response": "generate_response"
-        }
-    )
-    
-    # Add edge from web search to response generation
-    workflow.add_edge("web_search", "generate_response")
+    # Join waits for both concurrent lookups before response generation
+    workflow.add_edge(["fetch_news", "web_search"], "join_results")
+    workflow.add_edge("join_results", "generate_response")
     
     # Add edges to END
     workflow.add_edge("generate_response", END)
     workflow.add_edge("handle_general", END)
     
-    # Compile the graph
+    # Compile the graph. No checkpointer: state passes between steps in
+    # memory and is never serialized, so there is no serde cost per step
     return workflow.compile()
 
 
-def run_workflow(user_input: str, chat_history: list = None) -> dict:
+def _initial_state(user_input: str, chat_history: list = None) -> dict:
     """
-    Execute the workflow for a given user input
+    Build the initial graph state for a query
     
     Args:
         user_input: The user's query
         chat_history: Previous conversation messages
         
     Returns:
-        Dictionary containing the final state with response
+        Initial state dictionary
     """
     if chat_history is None:
         chat_history = []
     
-    # Initialize state
-    initial_state = {
+    return {
         "user_input": user_input,
         "chat_history": chat_history,
+        "formatted_history": None,
         "query_classification": None,
+        "draft_response": None,
         "news_results": None,
         "web_search_results": None,
         "final_response": "",
         "error": None,
         "metadata": {}
     }
+
+
+def _cache_key(user_input: str, chat_history: list = None) -> bytes:
+    """
+    Build the response cache key for a query
+    
+    The conversation and today's date are part of the key, so follow-up
+    questions and news lookups are never answered from another context.
+    
+    Args:
+        user_input: The user's query
+        chat_history: Previous conversation messages
+        
+    Returns:
+        Digest identifying the query
+    """
+    payload = json.dumps(
+        [user_input, chat_history or [], date.today().isoformat()],
+        ensure_ascii=False
+    )
+    return hashlib.blake2b(payload.encode(), digest_size=16).digest()
+
+
+def _get_cached_state(key: bytes) -> Optional[dict]:
+    """Return the cached final state for a key, if still fresh"""
+    with _response_cache_lock:
+        return _response_cache.get(key)
+
+
+def _is_cacheable(final_state: dict) -> bool:
+    """
+    Check whether a finished run's response may be served again
+    
+    Runs that failed, or whose news or web lookup failed (so the answer was
+    built without that context), are not cached.
     
-    # Create and run workflow
-    print(f"\n{'='*60}")
-    print(f"Processing query: {user_input}")
-    print(f"{'='*60}")
+    Args:
+        final_state: State returned by the workflow
+        
+    Returns:
+        True if the response can be cached
+    """
+    if final_state.get("error") or not final_state.get("final_response"):
+        return False
+    
+    for lookup in ("news_results", "web_search_results"):
+        results = final_state.get(lookup)
+        if results is not None and results.get("status") == "error":
+            return False
+    
+    return True
+
+
+def _cache_state(key: bytes, final_state: dict) -> None:
+    """Cache a final state if the run succeeded"""
+    if not _is_cacheable(final_state):
+        return
+    with _response_cache_lock:
+        _response_cache[key] = final_state
+
+
+async def _ainvoke(workflow, initial_state: dict) -> dict:
+    """Run the workflow to completion on the shared executor"""
+    asyncio.get_running_loop().set_default_executor(_executor)
+    return await workflow.ainvoke(initial_state)
+
+
+def run_workflow(user_input: str, chat_history: list = None) -> dict:
+    """
+    Execute the workflow for a given user input
+    
+    Args:
+        user_input: The user's query
+        chat_history: Previous conversation messages
+        
+    Returns:
+        Dictionary containing the final state with response
+    """
+    # Repeat queries within the TTL skip the pipeline
+    key = _cache_key(user_input, chat_history)
+    cached_state = _get_cached_state(key)
+    if cached_state is not None:
+        logger.debug("Cache hit for query: %s", user_input)
+        return dict(cached_state)
+    
+    # Initialize state
+    initial_state = _initial_state(user_input, chat_history)
+    
+    # Run workflow
+    logger.debug("Processing query: %s", user_input)
+    
+    workflow = create_workflow()
+    final_state = asyncio.run(_ainvoke(workflow, initial_state))
+    _cache_state(key, final_state)
+    
+    logger.debug("Workflow completed")
+    
+    return final_state
+
+
+async def stream_workflow(user_input: str, chat_history: list = None) -> AsyncIterator[str]:
+    """
+    Execute the workflow and yield the response as it is generated
     
+    Errors reported by earlier steps are yielded as a warning line ahead of
+    the response, matching the format of the non-streaming path.
+    
+    Args:
+        user_input: The user's query
+        chat_history: Previous conversation messages
+        
+    Yields:
+        Chunks of the response text
+    """
+    key = _cache_key(user_input, chat_history)
+    cached_state = _get_cached_state(key)
+    if cached_state is not None:
+        logger.debug("Cache hit for query: %s", user_input)
+        yield cached_state["final_response"]
+        return
+    
+    initial_state = _initial_state(user_input, chat_history)
+    
+    logger.debug("Processing query: %s", user_input)
+    
+    asyncio.get_running_loop().set_default_executor(_executor)
     workflow = create_workflow()
-    final_state = workflow.invoke(initial_state)
+    final_state = initial_state
+    reported_error = None
+    streamed = False
+    
+    # "custom" carries response chunks from the stream writer,
+    # "values" carries the state after each step
+    async for mode, chunk in workflow.astream(initial_state, stream_mode=["custom", "values"]):
+        if mode == "custom":
+            streamed = True
+            yield chunk
+            continue
+        
+        final_state = chunk
+        error = chunk.get("error")
+        if error and error != reported_error and not streamed:
+            reported_error = error
+            yield f"⚠️ {error}\n\n"
     
-    print(f"{'='*60}")
-    print("Workflow completed!")
-    print(f"{'='*60}\n")
+    # Fall back to the stored response if nothing was streamed
+    if not streamed:
+        yield final_state.get("final_response") or "I apologize, but I couldn't generate a response."
     
-    return final_state
\ No newline at end of file
+    _cache_state(key, final_state)
+    logger.debug("Workflow completed")
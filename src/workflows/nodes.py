@@ -2,7 +2,11 @@
 Workflow nodes for the NewsGenie LangGraph
 Each node represents a step in the query processing pipeline
 """
-from typing import Dict, Any
+import logging
+import re
+from functools import cache
+from typing import Dict, Any, Literal
+from langgraph.types import Command, StreamWriter
 from src.workflows.state import GraphState
 from src.agents.chatbot import NewsGenieAgent
 from src.tools.news_fetcher import NewsFetcher
@@ -10,170 +14,272 @@ from src.tools.web_search import WebSearchTool
 from src.config import settings
 
 
-# Initialize tools (singleton pattern)
-chatbot_agent = None
-news_fetcher = None
-web_search_tool = None
+logger = logging.getLogger("newsgenie.workflow")
 
+# Matches the first news category mentioned in a query
+_CATEGORY_RE = re.compile(
+    r"\b(" + "|".join(re.escape(c) for c in settings.news_categories) + r")\b",
+    re.IGNORECASE
+)
 
+# Most articles / web results kept in state and used as response context
+MAX_CONTEXT_ARTICLES = 5
+MAX_CONTEXT_RESULTS = 3
+
+# Context entries for the response prompt, one per article / search result
+CONTEXT_ARTICLE_TEMPLATE = (
+    "{index}. {article.title}\n"
+    "   Source: {article.source}\n"
+    "   {article.description}\n"
+    "   URL: {article.url}\n"
+)
+CONTEXT_RESULT_TEMPLATE = (
+    "{index}. {result.title}\n"
+    "   {result.snippet}\n"
+    "   URL: {result.url}\n"
+)
+
+
+# Tool singletons - built lazily on first use (NewsFetcher needs an API key),
+# then shared by every node call, rerun and session in the process
+@cache
 def get_chatbot_agent() -> NewsGenieAgent:
     """Get or create chatbot agent instance"""
-    global chatbot_agent
-    if chatbot_agent is None:
-        chatbot_agent = NewsGenieAgent()
-    return chatbot_agent
+    return NewsGenieAgent()
 
 
+@cache
 def get_news_fetcher() -> NewsFetcher:
     """Get or create news fetcher instance"""
-    global news_fetcher
-    if news_fetcher is None:
-        news_fetcher = NewsFetcher()
-    return news_fetcher
+    return NewsFetcher()
 
 
+@cache
 def get_web_search_tool() -> WebSearchTool:
     """Get or create web search tool instance"""
-    global web_search_tool
-    if web_search_tool is None:
-        web_search_tool = WebSearchTool()
-    return web_search_tool
+    return WebSearchTool()
+
+
+def _stream_response(
+    agent: NewsGenieAgent,
+    user_input: str,
+    formatted_history: list,
+    writer: StreamWriter
+) -> str:
+    """
+    Stream the agent's response through the writer and return the full text
+    
+    LLM errors are raised rather than returned as an apology, so the calling
+    node records them in state["error"].
+    """
+    chunks = []
+    for chunk in agent.stream(user_input, formatted_history, raise_errors=True):
+        writer(chunk)
+        chunks.append(chunk)
+    return "".join(chunks)
+
+
+def _get_formatted_history(agent: NewsGenieAgent, state: GraphState) -> list:
+    """Return the LangChain-formatted chat history, formatting it only once per run"""
+    formatted_history = state.get("formatted_history")
+    if formatted_history is None:
+        formatted_history = agent.format_chat_history(state.get("chat_history", []))
+    return formatted_history
 
 
-def classify_query_node(state: GraphState) -> GraphState:
+def classify_query_node(
+    state: GraphState,
+    writer: StreamWriter
+) -> Command[Literal["fetch_news", "web_search", "handle_general"]]:
     """
-    Node: Classify the user's query as news-related or general
+    Node: Classify the user's query as news-related or general, and route it
+    
+    When the LLM is needed to classify, the same call drafts the answer for
+    general queries; the draft streams through the writer as it arrives.
+    News queries fan out to both news fetching and web search, which then
+    run concurrently.
     
     Args:
         state: Current graph state
+        writer: Stream writer that receives draft chunks as they arrive
         
     Returns:
-        Updated state with classification results
+        Command with the classification update and the next node(s)
     """
-    print("🔍 Classifying query...")
+    logger.debug("Classifying query")
     
     try:
         agent = get_chatbot_agent()
         user_input = state["user_input"]
+        formatted_history = _get_formatted_history(agent, state)
         
-        # Classify the query
-        classification = agent.classify_query(user_input)
-        
-        state["query_classification"] = classification
-        state["metadata"]["classification_confidence"] = classification.get("confidence", 0.0)
+        # Classify the query, drafting a general response in the same call
+        result = agent.classify_and_draft(user_input, formatted_history, on_token=writer)
+        draft_response = result.pop("draft_response")
+        draft_error = result.pop("draft_error")
+        classification = result
         
-        print(f"   Classification: {'News' if classification['is_news_request'] else 'General'}")
-        print(f"   Confidence: {classification['confidence']:.2f}")
+        logger.debug(
+            "Classification: %s (confidence %.2f)",
+            "news" if classification["is_news_request"] else "general",
+            classification["confidence"]
+        )
         
     except Exception as e:
-        state["error"] = f"Classification error: {str(e)}"
-        print(f"❌ Error: {e}")
+        logger.error("Classification error: %s", e)
+        return Command(
+            update={"error": f"Classification error: {str(e)}"},
+            goto="handle_general"
+        )
+    
+    # Route to news fetching if classified as news with reasonable confidence
+    if classification["is_news_request"] and classification["confidence"] > 0.6:
+        goto = ["fetch_news", "web_search"]
+    else:
+        goto = "handle_general"
     
-    return state
+    update = {
+        "formatted_history": formatted_history,
+        "query_classification": classification,
+        "draft_response": draft_response,
+        "metadata": {"classification_confidence": classification.get("confidence", 0.0)}
+    }
+    if draft_error:
+        update["error"] = f"General query error: {draft_error}"
+    
+    return Command(update=update, goto=goto)
 
 
-def fetch_news_node(state: GraphState) -> GraphState:
+async def fetch_news_node(state: GraphState) -> Dict[str, Any]:
     """
     Node: Fetch news articles based on the query
     
+    Runs concurrently with web_search_node.
+    
     Args:
         state: Current graph state
         
     Returns:
-        Updated state with news results
+        State update with news results and the article count in metadata
     """
-    print("📰 Fetching news...")
+    logger.debug("Fetching news")
     
     try:
         fetcher = get_news_fetcher()
         user_input = state["user_input"]
         
-        # Try to extract category or use search
-        query_lower = user_input.lower()
-        category = None
-        
-        # Check if query mentions a specific category
-        for cat in settings.news_categories:
-            if cat in query_lower:
-                category = cat
-                break
+        # Check if query mentions a specific category, otherwise use search
+        match = _CATEGORY_RE.search(user_input)
+        category = match.group(1).lower() if match else None
         
         # Fetch news
         if category:
-            print(f"   Using category: {category}")
-            results = fetcher.get_news_by_category(category)
+            logger.debug("Using category: %s", category)
+            results = await fetcher.aget_news_by_category(
+                category, page_size=MAX_CONTEXT_ARTICLES
+            )
         else:
-            print(f"   Searching for: {user_input}")
-            results = fetcher.search_news(user_input, page_size=5)
-        
-        state["news_results"] = results
+            logger.debug("Searching news for: %s", user_input)
+            results = await fetcher.asearch_news(user_input, page_size=MAX_CONTEXT_ARTICLES)
         
+        # Keep only the articles the response can use
+        articles = (results.get("articles") or [])[:MAX_CONTEXT_ARTICLES]
+        results = {**results, "articles": articles}
+        article_count = len(articles)
         if results["status"] == "success":
-            print(f"   ✅ Found {len(results['articles'])} articles")
+            logger.debug("Found %d articles", article_count)
         else:
-            print(f"   ⚠️ {results['message']}")
+            logger.debug("News fetch: %s", results["message"])
+        
+        return {
+            "news_results": results,
+            "metadata": {"article_count": article_count}
+        }
         
     except Exception as e:
-        state["error"] = f"News fetch error: {str(e)}"
-        print(f"❌ Error: {e}")
-    
-    return state
+        logger.error("News fetch error: %s", e)
+        return {"error": f"News fetch error: {str(e)}"}
 
 
-def web_search_node(state: GraphState) -> GraphState:
+async def web_search_node(state: GraphState) -> Dict[str, Any]:
     """
     Node: Perform web search for additional context
     
+    Runs concurrently with fetch_news_node.
+    
     Args:
         state: Current graph state
         
     Returns:
-        Updated state with web search results
+        State update with web search results
     """
-    print("🔎 Performing web search...")
+    logger.debug("Performing web search")
     
     try:
         search_tool = get_web_search_tool()
         user_input = state["user_input"]
         
         # Perform search
-        results = search_tool.search(user_input, max_results=5)
-        
-        state["web_search_results"] = results
+        results = await search_tool.asearch(user_input, max_results=MAX_CONTEXT_RESULTS)
         
         if results["status"] == "success":
-            print(f"   ✅ Found {len(results['results'])} results")
+            logger.debug("Found %d web results", len(results["results"]))
         else:
-            print(f"   ⚠️ {results['message']}")
+            logger.debug("Web search: %s", results["message"])
+        
+        return {"web_search_results": results}
         
     except Exception as e:
         # Don't fail the entire workflow if web search fails
-        state["web_search_results"] = {
-            "status": "error",
-            "message": str(e),
-            "results": []
+        logger.warning("Web search failed: %s", e)
+        return {
+            "web_search_results": {
+                "status": "error",
+                "message": str(e),
+                "results": []
+            }
         }
-        print(f"⚠️ Web search failed: {e}")
+
+
+def join_results_node(state: GraphState) -> Dict[str, Any]:
+    """
+    Node: Join the concurrent news and web search results
+    
+    Web results are only kept when the news fetch failed or returned
+    limited results; otherwise they are dropped before response generation.
     
-    return state
+    Args:
+        state: Current graph state
+        
+    Returns:
+        State update with unused web search results cleared
+    """
+    news_results = state.get("news_results")
+    if news_results is None or news_results["status"] == "error":
+        return {}
+    
+    if state["metadata"].get("article_count", 0) < 3:
+        return {}
+    
+    return {"web_search_results": None}
 
 
-def generate_response_node(state: GraphState) -> GraphState:
+def generate_response_node(state: GraphState, writer: StreamWriter) -> Dict[str, Any]:
     """
     Node: Generate final response using the chatbot and collected information
     
     Args:
         state: Current graph state
+        writer: Stream writer that receives response chunks as they arrive
         
     Returns:
-        Updated state with final response
+        State update with the final response
     """
-    print("💬 Generating response...")
+    logger.debug("Generating response")
     
     try:
         agent = get_chatbot_agent()
         user_input = state["user_input"]
-        chat_history = state.get("chat_history", [])
         
         # Build context from news and search results
         context_parts = []
@@ -184,29 +290,25 @@ def generate_response_node(state: GraphState) -> GraphState:
             articles = news_results.get("articles", [])
             if articles:
                 context_parts.append("**Recent News Articles:**\n")
-                for i, article in enumerate(articles[:5], 1):
-                    context_parts.append(
-                        f"{i}. {article['title']}\n"
-                        f"   Source: {article['source']}\n"
-                        f"   {article['description']}\n"
-                        f"   URL: {article['url']}\n"
-                    )
+                context_parts.extend(
+                    CONTEXT_ARTICLE_TEMPLATE.format(index=i, article=article)
+                    for i, article in enumerate(articles, 1)
+                )
         
-        # Add web search results if available
+        # Add web search results if available; join_results_node has
+        # already cleared them when the news results were sufficient
         web_results = state.get("web_search_results")
         if web_results and web_results.get("status") == "success":
             results = web_results.get("results", [])
-            if results and not news_results:  # Only add if no news results
+            if results:
                 context_parts.append("\n**Additional Information:**\n")
-                for i, result in enumerate(results[:3], 1):
-                    context_parts.append(
-                        f"{i}. {result['title']}\n"
-                        f"   {result['snippet']}\n"
-                        f"   URL: {result['url']}\n"
-                    )
+                context_parts.extend(
+                    CONTEXT_RESULT_TEMPLATE.format(index=i, result=result)
+                    for i, result in enumerate(results, 1)
+                )
         
         # Combine context
-        context = "\n".join(context_parts) if context_parts else ""
+        context = "\n".join(context_parts)
         
         # Create enhanced prompt
         if context:
@@ -220,48 +322,59 @@ Please provide a helpful, informative response that synthesizes the information
         else:
             enhanced_input = user_input
         
-        # Generate response
-        formatted_history = agent.format_chat_history(chat_history)
-        response = agent.chat(enhanced_input, formatted_history)
+        # Generate response, streaming chunks to the caller
+        formatted_history = _get_formatted_history(agent, state)
+        response = _stream_response(agent, enhanced_input, formatted_history, writer)
         
-        state["final_response"] = response
-        print("   ✅ Response generated")
+        logger.debug("Response generated")
+        return {"final_response": response}
         
     except Exception as e:
-        state["error"] = f"Response generation error: {str(e)}"
-        state["final_response"] = f"I apologize, but I encountered an error: {str(e)}"
-        print(f"❌ Error: {e}")
-    
-    return state
+        logger.error("Response generation error: %s", e)
+        apology = f"I apologize, but I encountered an error: {str(e)}"
+        writer(apology)
+        return {
+            "error": f"Response generation error: {str(e)}",
+            "final_response": apology
+        }
 
 
-def handle_general_query_node(state: GraphState) -> GraphState:
+def handle_general_query_node(state: GraphState, writer: StreamWriter) -> Dict[str, Any]:
     """
     Node: Handle general (non-news) queries directly with the chatbot
     
     Args:
         state: Current graph state
+        writer: Stream writer that receives response chunks as they arrive
         
     Returns:
-        Updated state with response
+        State update with the final response
     """
-    print("💭 Handling general query...")
+    logger.debug("Handling general query")
     
     try:
+        # Reuse the response drafted during classification (already streamed,
+        # so it is never generated a second time)
+        draft_response = state.get("draft_response")
+        if draft_response is not None:
+            logger.debug("Using drafted response")
+            return {"final_response": draft_response}
+        
         agent = get_chatbot_agent()
         user_input = state["user_input"]
-        chat_history = state.get("chat_history", [])
         
-        # Generate response directly
-        formatted_history = agent.format_chat_history(chat_history)
-        response = agent.chat(user_input, formatted_history)
+        # Generate response directly, streaming chunks to the caller
+        formatted_history = _get_formatted_history(agent, state)
+        response = _stream_response(agent, user_input, formatted_history, writer)
         
-        state["final_response"] = response
-        print("   ✅ Response generated")
+        logger.debug("Response generated")
+        return {"final_response": response}
         
     except Exception as e:
-        state["error"] = f"General query error: {str(e)}"
-        state["final_response"] = f"I apologize, but I encountered an error: {str(e)}"
-        print(f"❌ Error: {e}")
-    
-    return state
\ No newline at end of file
+        logger.error("General query error: %s", e)
+        apology = f"I apologize, but I encountered an error: {str(e)}"
+        writer(apology)
+        return {
+            "error": f"General query error: {str(e)}",
+            "final_response": apology
+        }
\ No newline at end of file
@@ -2,7 +2,29 @@
 State definitions for the NewsGenie LangGraph workflow
 """
 from typing import TypedDict, List, Dict, Any, Optional, Annotated
-import operator
+from src.config import settings
+
+
+# Most messages kept in the chat_history channel (user and assistant turns)
+MAX_HISTORY = settings.max_history_turns * 2
+
+
+def _history_reducer(
+    current: Optional[List[Dict[str, str]]],
+    new: Optional[List[Dict[str, str]]]
+) -> List[Dict[str, str]]:
+    """Append new messages to the history, keeping only the last MAX_HISTORY"""
+    if MAX_HISTORY <= 0:
+        return []
+    return ((current or []) + (new or []))[-MAX_HISTORY:]
+
+
+def _dict_merge(
+    current: Optional[Dict[str, Any]],
+    new: Optional[Dict[str, Any]]
+) -> Dict[str, Any]:
+    """Merge a partial metadata update into the existing metadata"""
+    return {**(current or {}), **(new or {})}
 
 
 class GraphState(TypedDict):
@@ -12,7 +34,9 @@ class GraphState(TypedDict):
     Attributes:
         user_input: The user's query or message
         chat_history: List of previous messages in the conversation
+        formatted_history: chat_history as LangChain messages, formatted once per run
         query_classification: Classification results (news vs general query)
+        draft_response: General-query response drafted during classification
         news_results: Results from news API
         web_search_results: Results from web search
         final_response: The generated response to return to user
@@ -21,10 +45,12 @@ class GraphState(TypedDict):
     """
     # Core inputs
     user_input: str
-    chat_history: Annotated[List[Dict[str, str]], operator.add]
+    chat_history: Annotated[List[Dict[str, str]], _history_reducer]
+    formatted_history: Optional[List[Any]]
     
     # Classification
     query_classification: Optional[Dict[str, Any]]
+    draft_response: Optional[str]
     
     # Tool results
     news_results: Optional[Dict[str, Any]]
@@ -37,4 +63,4 @@ class GraphState(TypedDict):
     error: Optional[str]
     
     # Metadata
-    metadata: Dict[str, Any]
\ No newline at end of file
+    metadata: Annotated[Dict[str, Any], _dict_merge]
\ No newline at end of file
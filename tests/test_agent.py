@@ -0,0 +1,157 @@
+"""
+Test query classification and response drafting (no API keys required)
+"""
+import pytest
+from langchain_core.messages import AIMessageChunk
+
+from src.agents.chatbot import DRAFT_HOLD_CHARS, NewsGenieAgent
+from src.config import settings
+
+
+class StubDrafter:
+    """Stands in for the tool-bound chat chain, replaying fixed chunks"""
+    
+    def __init__(self, chunks, error=None):
+        self.chunks = chunks
+        self.error = error
+    
+    def stream(self, inputs):
+        yield from self.chunks
+        if self.error is not None:
+            raise self.error
+
+
+def draft(chunks, error=None):
+    """Run classify_and_draft on an ambiguous query, returning (result, tokens)"""
+    agent = NewsGenieAgent.__new__(NewsGenieAgent)
+    agent.drafter = StubDrafter(chunks, error)
+    tokens = []
+    result = agent.classify_and_draft(
+        "Tell me about recent AI developments", [], on_token=tokens.append
+    )
+    return result, tokens
+
+
+def tool_call_chunk():
+    """Build the first streamed chunk of a NewsLookup tool call"""
+    return AIMessageChunk(
+        content="",
+        tool_call_chunks=[{"name": "NewsLookup", "args": "{}", "id": "call_1", "index": 0}]
+    )
+
+
+@pytest.mark.parametrize("query", [
+    "What's the latest news in technology?",
+    "Show me today's business headlines",
+    "Any breaking news?",
+])
+def test_news_keywords_route_to_news(query):
+    """Strong news keywords are classified as news without the LLM"""
+    result = NewsGenieAgent._classify_by_keywords(query)
+    assert result is not None
+    assert result["is_news_request"] is True
+
+
+@pytest.mark.parametrize("query", [
+    "How do I start a small business?",
+    "What are the health benefits of green tea?",
+    "Explain the science behind rainbows",
+    "What is general relativity?",
+])
+def test_category_words_alone_are_not_news(query):
+    """Category names in everyday questions do not force a news lookup"""
+    result = NewsGenieAgent._classify_by_keywords(query)
+    assert result is None or result["is_news_request"] is False
+
+
+@pytest.mark.parametrize("query", [
+    "How do I bake sourdough bread?",
+    "What are the benefits of green tea?",
+    "Explain how rainbows form",
+    "Why is the sky blue?",
+])
+def test_general_question_openers_route_to_general(query):
+    """How-to and explanation questions are general without the LLM"""
+    result = NewsGenieAgent._classify_by_keywords(query)
+    assert result is not None
+    assert result["is_news_request"] is False
+    assert result["reasoning"] == "general question pattern"
+
+
+@pytest.mark.parametrize("query", [
+    "How do I find the latest sports news?",
+    "What is happening in the markets this week?",
+    "What are today's top stories?",
+    "What is new in technology?",
+    "What are the top stories in sports today?",
+    "What is the stock market doing today?",
+    "Why is the stock market down today?",
+    "How can I follow the election results?",
+    "How do I start a small business?",
+])
+def test_general_openers_defer_to_news_signals(query):
+    """Openers never override news keywords or current-events phrasing"""
+    result = NewsGenieAgent._classify_by_keywords(query)
+    assert result is None or result["is_news_request"] is True
+
+
+def test_preamble_before_news_lookup_is_not_shown():
+    """A short preamble ahead of a tool call never reaches the user"""
+    result, tokens = draft([AIMessageChunk(content="Let me check."), tool_call_chunk()])
+    assert result["is_news_request"] is True
+    assert tokens == []
+
+
+def test_direct_answer_streams_as_draft():
+    """A direct answer is streamed and kept as the draft"""
+    answer = "x" * (DRAFT_HOLD_CHARS + 20)
+    result, tokens = draft([AIMessageChunk(content=answer[:50]), AIMessageChunk(content=answer[50:])])
+    assert result["is_news_request"] is False
+    assert "".join(tokens) == answer
+    assert result["draft_response"] == answer
+    assert result["draft_error"] is None
+
+
+def test_failure_after_streaming_ends_the_draft():
+    """Once tokens are out, a failure ends the draft instead of restarting it"""
+    partial = "y" * DRAFT_HOLD_CHARS
+    result, tokens = draft([AIMessageChunk(content=partial)], error=RuntimeError("boom"))
+    assert result["is_news_request"] is False
+    assert result["draft_response"] == "".join(tokens)
+    assert result["draft_response"].startswith(partial)
+    assert result["draft_error"] == "boom"
+
+
+def test_failure_before_streaming_falls_back():
+    """A failure before anything was shown leaves no draft"""
+    result, tokens = draft([AIMessageChunk(content="Sure")], error=RuntimeError("boom"))
+    assert tokens == []
+    assert result["draft_response"] is None
+    assert result["confidence"] == 0.5
+
+
+@pytest.mark.parametrize("query", [
+    "sports today",
+    "business updates",
+    "election results",
+    "tech updates please",
+])
+def test_short_queries_with_news_hints_defer_to_llm(query):
+    """Short queries naming a category or time marker are not chit-chat"""
+    assert NewsGenieAgent._classify_by_keywords(query) is None
+
+
+@pytest.mark.parametrize("query", ["hi", "thanks!", "who are you?"])
+def test_short_small_talk_routes_to_general(query):
+    """Short queries without news hints are general without the LLM"""
+    result = NewsGenieAgent._classify_by_keywords(query)
+    assert result is not None
+    assert result["is_news_request"] is False
+
+
+@pytest.mark.parametrize("turns, expected", [(0, 0), (1, 2), (12, 24)])
+def test_recent_history_respects_turn_limit(monkeypatch, turns, expected):
+    """The history window is max_history_turns turns, and empty at zero"""
+    monkeypatch.setattr(settings, "max_history_turns", turns)
+    history = [{"role": "user", "content": str(i)} for i in range(50)]
+    assert len(NewsGenieAgent._recent_history(history)) == expected
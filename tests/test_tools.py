@@ -40,8 +40,8 @@ def test_news_fetcher():
             if response['articles']:
                 print("\n   Sample article:")
                 article = response['articles'][0]
-                print(f"   Title: {article['title']}")
-                print(f"   Source: {article['source']}")
+                print(f"   Title: {article.title}")
+                print(f"   Source: {article.source}")
         else:
             print(f"❌ Error: {response['message']}")
             return False
@@ -97,8 +97,8 @@ def test_web_search():
             if response['results']:
                 print("\n   Sample result:")
                 result = response['results'][0]
-                print(f"   Title: {result['title']}")
-                print(f"   Source: {result['source']}")
+                print(f"   Title: {result.title}")
+                print(f"   Source: {result.source}")
         else:
             print(f"❌ Error: {response['message']}")
             return False
@@ -1,6 +1,7 @@
 """
 Test the complete LangGraph workflow
 """
+import asyncio
 import sys
 import os
 
@@ -8,10 +9,137 @@ import os
 project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 sys.path.insert(0, project_root)
 
-from src.workflows.graph import run_workflow
+from src.workflows import graph, nodes, state
+from src.workflows.graph import run_workflow, stream_workflow
+from src.tools.news_fetcher import Article
+from src.tools.web_search import WebResult
 from src.config import settings
 
 
+class FailingAgent:
+    """Agent stub whose LLM call fails, as on an OpenAI rate limit"""
+    
+    def __init__(self):
+        self.calls = 0
+    
+    def classify_and_draft(self, user_input, chat_history, on_token=None):
+        return {
+            "is_news_request": False,
+            "confidence": 0.9,
+            "reasoning": "stub",
+            "draft_response": None,
+            "draft_error": None
+        }
+    
+    def format_chat_history(self, messages):
+        return []
+    
+    def stream(self, user_input, chat_history=None, raise_errors=False):
+        self.calls += 1
+        raise RuntimeError("429 Too Many Requests")
+
+
+class NewsAgent:
+    """Agent stub that routes every query to news and records its prompts"""
+    
+    def __init__(self):
+        self.prompts = []
+    
+    def classify_and_draft(self, user_input, chat_history, on_token=None):
+        return {
+            "is_news_request": True,
+            "confidence": 0.9,
+            "reasoning": "stub",
+            "draft_response": None,
+            "draft_error": None
+        }
+    
+    def format_chat_history(self, messages):
+        return []
+    
+    def stream(self, user_input, chat_history=None, raise_errors=False):
+        self.prompts.append(user_input)
+        yield "answer"
+
+
+class StubNewsFetcher:
+    """News fetcher stub returning a fixed number of articles"""
+    
+    def __init__(self, article_count):
+        self.article_count = article_count
+        self.calls = 0
+        self.page_sizes = []
+    
+    async def asearch_news(self, query, page_size=None):
+        self.calls += 1
+        self.page_sizes.append(page_size)
+        article = Article("Title", "Description", "https://example.com/a", "Source", "", "", "", "")
+        return {
+            "status": "success",
+            "articles": [article] * self.article_count,
+            "message": f"Found {self.article_count} articles"
+        }
+    
+    async def aget_news_by_category(self, category, country="us", page_size=None):
+        return await self.asearch_news(category, page_size=page_size)
+
+
+class StubWebSearch:
+    """Web search stub returning one result"""
+    
+    def __init__(self):
+        self.calls = 0
+    
+    async def asearch(self, query, max_results=None, region="wt-wt"):
+        self.calls += 1
+        result = WebResult("Web title", "Web snippet", "https://example.com/w", "example.com")
+        return {"status": "success", "results": [result], "message": "Found 1 results"}
+
+
+def run_news_query(monkeypatch, article_count, query="what did the central bank decide"):
+    """Run a news query through the graph with stubbed tools"""
+    agent = NewsAgent()
+    fetcher = StubNewsFetcher(article_count)
+    search = StubWebSearch()
+    monkeypatch.setattr(nodes, "get_chatbot_agent", lambda: agent)
+    monkeypatch.setattr(nodes, "get_news_fetcher", lambda: fetcher)
+    monkeypatch.setattr(nodes, "get_web_search_tool", lambda: search)
+    monkeypatch.setattr(graph, "_response_cache", graph.TTLCache(maxsize=8, ttl=60))
+    
+    result = run_workflow(query)
+    return result, agent, fetcher, search
+
+
+def test_news_path_drops_web_results_with_enough_articles(monkeypatch):
+    """Both lookups run; web results are dropped when news has 3+ articles"""
+    result, agent, fetcher, search = run_news_query(monkeypatch, article_count=4)
+    
+    assert fetcher.calls == 1 and search.calls == 1
+    assert result["metadata"]["article_count"] == 4
+    assert result["web_search_results"] is None
+    assert result["final_response"] == "answer"
+    assert "**Recent News Articles:**" in agent.prompts[0]
+    assert "Web snippet" not in agent.prompts[0]
+
+
+def test_news_path_keeps_web_results_with_few_articles(monkeypatch):
+    """Web results are kept and used when news has fewer than 3 articles"""
+    result, agent, fetcher, search = run_news_query(monkeypatch, article_count=1)
+    
+    assert fetcher.calls == 1 and search.calls == 1
+    assert result["metadata"]["article_count"] == 1
+    assert result["web_search_results"]["status"] == "success"
+    assert "**Recent News Articles:**" in agent.prompts[0]
+    assert "Web snippet" in agent.prompts[0]
+
+
+def test_news_lookups_request_only_the_articles_used(monkeypatch):
+    """Search and category lookups both ask NewsAPI for the context size"""
+    for query in ("what did the central bank decide", "anything in sports"):
+        _, _, fetcher, _ = run_news_query(monkeypatch, article_count=8, query=query)
+        assert fetcher.page_sizes == [nodes.MAX_CONTEXT_ARTICLES]
+
+
 def test_workflow():
     """Test the complete workflow with different query types"""
     
@@ -119,6 +247,51 @@ def test_workflow():
     print(f"{'='*70}\n")
 
 
+async def print_streamed_response(user_input: str, chat_history: list) -> str:
+    """Print the workflow response as it streams and return the full text"""
+    chunks = []
+    print("\nNewsGenie: ", end="", flush=True)
+    async for chunk in stream_workflow(user_input, chat_history):
+        print(chunk, end="", flush=True)
+        chunks.append(chunk)
+    print()
+    return "".join(chunks)
+
+
+def test_llm_failure_is_reported_and_not_cached(monkeypatch):
+    """A failed LLM call sets the error and is not served from the cache"""
+    agent = FailingAgent()
+    monkeypatch.setattr(nodes, "get_chatbot_agent", lambda: agent)
+    monkeypatch.setattr(graph, "_response_cache", graph.TTLCache(maxsize=8, ttl=60))
+    
+    for _ in range(2):
+        result = run_workflow("tell me a joke about cats please")
+        assert result["error"] == "General query error: 429 Too Many Requests"
+        assert result["final_response"].startswith("I apologize")
+    
+    assert agent.calls == 2
+    assert len(graph._response_cache) == 0
+
+
+def test_failed_lookup_is_not_cached():
+    """Answers built after a failed news or web lookup are not cached"""
+    succeeded = {"final_response": "answer", "error": None, "news_results": None}
+    assert graph._is_cacheable(succeeded)
+    
+    for lookup in ("news_results", "web_search_results"):
+        failed = {**succeeded, lookup: {"status": "error", "message": "HTTP 429"}}
+        assert not graph._is_cacheable(failed)
+
+
+def test_history_reducer_keeps_nothing_at_zero(monkeypatch):
+    """A zero history limit keeps no messages rather than all of them"""
+    history = [{"role": "user", "content": str(i)} for i in range(50)]
+    monkeypatch.setattr(state, "MAX_HISTORY", 0)
+    assert state._history_reducer(history, []) == []
+    monkeypatch.setattr(state, "MAX_HISTORY", 4)
+    assert state._history_reducer(history, []) == history[-4:]
+
+
 def test_interactive():
     """Interactive mode to test custom queries"""
     print("\n" + "="*70)
@@ -149,12 +322,8 @@ def test_interactive():
             if not user_input:
                 continue
             
-            # Run workflow
-            result = run_workflow(user_input, chat_history)
-            
-            # Display response
-            response = result.get("final_response", "No response generated")
-            print(f"\nNewsGenie: {response}")
+            # Run workflow, printing tokens as they arrive
+            response = asyncio.run(print_streamed_response(user_input, chat_history))
             
             # Update chat history
             chat_history.append({"role": "user", "content": user_input})